@@ -2,11 +2,9 @@
 
 import os
 import re
-import json
 import time
 import random
-import cloudscraper
-from bs4 import BeautifulSoup
+import orjson
 from datetime import datetime, timedelta, timezone
 
 # =================================================
@@ -17,38 +15,146 @@ IST = timezone(timedelta(hours=5, minutes=30))
 BMS_URL = "https://in.bookmyshow.com/movies/bengaluru/ntr-31/ET00311251"
 MOVIE_CODE = "ET00311251"
 
+# JSON endpoint the movie page XHRs for the badge; None scrapes HTML only
+BMS_API_URL = None
+BMS_API_FIELD = "interestedCount"  # dotted path to the count in the response
+
 BASE_FOLDER = "data"
-EVENT_FILE = os.path.join(BASE_FOLDER, f"{MOVIE_CODE}.json")
+HISTORY_COMPACT_EVERY = 4  # changed values per full rewrite (~2 days at ~2 changes/day)
+IO_BUFFER_SIZE = 1 << 16  # bytes
 
 MAX_RETRIES = 5
-BASE_DELAY = 2.0  # seconds
+BASE_DELAY = 0.5  # seconds, doubled per retry
+MAX_DELAY = 8.0  # seconds, backoff cap
+
+# Fallback: any body element whose own text mentions the badge word,
+# checked in document order; scripts/styles never hold the badge
+INTEREST_SELECTOR = "body *"
+INTEREST_SKIP_TAGS = {"script", "style", "noscript"}
+INTEREST_WORD_RE = re.compile(r"interested", re.IGNORECASE)
+
+# Fast path: badge text straight from the raw HTML bytes
+INTEREST_RE = re.compile(
+    rb"(\d[\d,]*(?:\.\d+)?)\s*K\+?\s*are\s*interested", re.IGNORECASE
+)
+
+# Count extraction from the badge text (uppercased by parse_interested)
+INTERESTED_COUNT_RE = re.compile(r"(\d+(\.\d+)?)\s*K\+?\s*ARE\s*INTERESTED")
 
 os.makedirs(BASE_FOLDER, exist_ok=True)
 
 # =================================================
 # HELPERS
 # =================================================
+_LAST_MINUTE = None
+_LAST_MINUTE_ISO = None
+
+
 def ist_now_iso():
-    return datetime.now(IST).isoformat(timespec="minutes")
+    """
+    Minute-resolution IST timestamp, formatted once per wall-clock minute.
+    """
+    global _LAST_MINUTE, _LAST_MINUTE_ISO
+    minute = int(time.time() // 60)
+    if minute != _LAST_MINUTE:
+        _LAST_MINUTE = minute
+        _LAST_MINUTE_ISO = datetime.fromtimestamp(minute * 60, IST).isoformat(
+            timespec="minutes"
+        )
+    return _LAST_MINUTE_ISO
 
 
 def get_random_ip():
     return ".".join(str(random.randint(1, 255)) for _ in range(4))
 
 
+def get_event_paths(movie_code):
+    """
+    Returns (event_file, last_updated_file, pending_file, http_cache_file)
+    for one event. The .lastupdated stamp lets unchanged polls skip the
+    full rewrite; new history points go to .pending.jsonl and are folded
+    into the event file in batches; .httpcache.json keeps the latest
+    ETag / Last-Modified for conditional GETs.
+    """
+    return (
+        os.path.join(BASE_FOLDER, f"{movie_code}.json"),
+        os.path.join(BASE_FOLDER, f"{movie_code}.lastupdated"),
+        os.path.join(BASE_FOLDER, f"{movie_code}.pending.jsonl"),
+        os.path.join(BASE_FOLDER, f"{movie_code}.httpcache.json"),
+    )
+
+
 def load_json(path, default):
     if os.path.exists(path):
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            with open(path, "rb", buffering=IO_BUFFER_SIZE) as f:
+                return orjson.loads(f.read())
         except Exception:
             pass
     return default
 
 
 def save_json(path, data):
+    # Serialize once, write in one call, then swap in atomically
+    payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb", buffering=IO_BUFFER_SIZE) as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def load_last_updated(path):
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    return None
+
+
+def save_last_updated(path, timestamp):
     with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write(timestamp + "\n")
+
+
+def save_http_cache(path, http_cache):
+    # None means "no usable validators": drop the file so the next poll
+    # does a full GET instead of replaying stale ones
+    if http_cache is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    save_json(path, http_cache)
+
+
+def load_pending(path):
+    if not os.path.exists(path):
+        return []
+
+    records = []
+    with open(path, "rb", buffering=IO_BUFFER_SIZE) as f:
+        for line in f:
+            try:
+                records.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                # Torn append from an interrupted run
+                pass
+    return records
+
+
+def append_pending(path, record):
+    with open(path, "ab") as f:
+        f.write(orjson.dumps(record) + b"\n")
+
+
+def apply_pending(data, records):
+    """
+    Folds pending history points into the loaded event data, so it
+    reflects every value recorded since the last compaction.
+    """
+    history = data.setdefault("history", {})
+    for record in records:
+        history[record["timestamp"]] = record["interested"]
+        data["last_value"] = record["interested"]
+        data["last_timestamp"] = record["timestamp"]
 
 
 def parse_interested(text: str) -> int:
@@ -58,14 +164,53 @@ def parse_interested(text: str) -> int:
     """
     text = text.replace(",", "").upper()
 
-    m = re.search(r"(\d+(\.\d+)?)\s*K\+?\s*ARE\s*INTERESTED", text)
+    m = INTERESTED_COUNT_RE.search(text)
     if not m:
         raise ValueError("Interested pattern not found")
 
     return int(round(float(m.group(1)) * 1000))
 
 
-def get_last_interest(history: dict):
+def find_interest_text(tree):
+    """
+    Returns the badge text from a parsed page, or None. The count and
+    the phrase can sit in sibling tags, so from each element mentioning
+    "interested" this walks up until the joined text holds the full
+    'X.XK+ are interested' pattern. Each ancestor is checked at most
+    once, and a miss at <body> ends the search.
+    """
+    checked = set()
+    for el in tree.css(INTEREST_SELECTOR):
+        if el.tag in INTEREST_SKIP_TAGS:
+            continue
+        if not INTEREST_WORD_RE.search(el.text(deep=False)):
+            continue
+
+        node = el
+        while node is not None and node.tag != "html":
+            # Already checked here, and so everything above it too
+            if node.mem_id in checked:
+                break
+            checked.add(node.mem_id)
+
+            text = " ".join(node.text(separator=" ").split())
+            if INTERESTED_COUNT_RE.search(text.replace(",", "").upper()):
+                return text
+            if node.tag == "body":
+                return None
+            node = node.parent
+    return None
+
+
+def get_last_interest(data: dict):
+    """
+    Returns the cached last_value; files written before it existed
+    fall back to scanning history for the newest timestamp.
+    """
+    if data.get("last_value") is not None:
+        return data["last_value"]
+
+    history = data.get("history")
     if not history:
         return None
     return history[max(history.keys())]
@@ -80,14 +225,35 @@ USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 11.0; Win64; x64; rv:{r}) Gecko/20100101 Firefox/{r}",
 ]
 
-def get_random_user_agent():
-    return random.choice(USER_AGENTS).format(
+UA_POOL_SIZE = 64  # formatted variants per template
+
+
+def build_user_agent(template):
+    return template.format(
         v=f"{random.randint(90,120)}.0.{random.randint(1000,5000)}.{random.randint(0,150)}",
         m=random.randint(12, 15),
         r=random.randint(90,120),
     )
 
 
+_UA_POOL = None
+
+
+def get_random_user_agent():
+    """
+    Picks from a pool formatted on first use, so importing the module
+    for its helpers never pays for building it.
+    """
+    global _UA_POOL
+    if _UA_POOL is None:
+        _UA_POOL = [
+            build_user_agent(template)
+            for _ in range(UA_POOL_SIZE)
+            for template in USER_AGENTS
+        ]
+    return random.choice(_UA_POOL)
+
+
 def get_headers():
     ip = get_random_ip()
     return {
@@ -100,43 +266,150 @@ def get_headers():
         "Client-IP": ip,
     }
 
+
+def get_conditional_headers(http_cache):
+    """
+    Builds If-None-Match / If-Modified-Since from the validators saved
+    by the last full (200) response.
+    """
+    headers = {}
+    if not http_cache:
+        return headers
+    if http_cache.get("etag"):
+        headers["If-None-Match"] = http_cache["etag"]
+    if http_cache.get("last_modified"):
+        headers["If-Modified-Since"] = http_cache["last_modified"]
+    return headers
+
+
+def extract_http_cache(res):
+    etag = res.headers.get("ETag")
+    last_modified = res.headers.get("Last-Modified")
+    if not etag and not last_modified:
+        return None
+    return {"etag": etag, "last_modified": last_modified}
+
+# =================================================
+# SHARED SESSION
+# =================================================
+_SCRAPER = None
+
+
+def get_scraper():
+    """
+    Lazily creates one cloudscraper session and reuses it, so retries
+    keep the TLS connection and Cloudflare clearance cookie warm.
+    The random UA/IP headers are pinned to the session, not per request.
+    """
+    global _SCRAPER
+    if _SCRAPER is None:
+        # Imported on first scrape so the file/parse helpers stay light
+        import cloudscraper
+
+        _SCRAPER = cloudscraper.create_scraper(
+            browser={"browser": "chrome", "platform": "windows", "mobile": False}
+        )
+        _SCRAPER.headers.update(get_headers())
+    return _SCRAPER
+
+
+def reset_scraper():
+    """
+    Drops the session after a hard block so the next attempt starts
+    with fresh cookies and a new UA/IP identity.
+    """
+    global _SCRAPER
+    _SCRAPER = None
+
+# =================================================
+# JSON API
+# =================================================
+def read_api_interest(res):
+    res.raise_for_status()
+
+    value = orjson.loads(res.content)
+    for key in BMS_API_FIELD.split("."):
+        value = value[key]
+    return int(value)
+
 # =================================================
 # SCRAPER WITH RETRY
 # =================================================
-def scrape_bms_interest():
-    scraper = cloudscraper.create_scraper(
-        browser={"browser": "chrome", "platform": "windows", "mobile": False}
-    )
+def scrape_bms_interest(
+    url=BMS_URL, http_cache=None, max_retries=MAX_RETRIES, api_url=BMS_API_URL
+):
+    """
+    Returns (interested, http_cache). interested is None when BMS
+    answers 304 Not Modified for the saved validators.
+    """
+    conditional_headers = get_conditional_headers(http_cache)
+    use_api = bool(api_url)
 
     last_error = None
 
-    for attempt in range(1, MAX_RETRIES + 1):
+    for attempt in range(1, max_retries + 1):
         try:
-            headers = get_headers()
-            sleep_time = BASE_DELAY * attempt + random.uniform(0.5, 1.5)
-            time.sleep(sleep_time)
+            # ⏳ Exponential backoff with jitter; first attempt goes out immediately
+            if attempt > 1:
+                sleep_time = min(MAX_DELAY, BASE_DELAY * 2 ** (attempt - 2))
+                time.sleep(sleep_time * random.uniform(0.8, 1.2))
+
+            # 🔁 Same session + identity across retries until a hard block
+            scraper = get_scraper()
+
+            # 🚀 API FIRST: one JSON field instead of a full HTML page
+            if use_api:
+                res = scraper.get(api_url, timeout=15)
+
+                # Blocks are handled like the HTML path: new session, retry
+                if res.status_code in (403, 429):
+                    reset_scraper()
+                    raise RuntimeError(f"API blocked (HTTP {res.status_code})")
+
+                try:
+                    return read_api_interest(res), http_cache
+                except Exception as e:
+                    # Bad status/body/field won't fix itself between attempts
+                    use_api = False
+                    print(f"[API] {type(e).__name__}: {e} | using HTML from now on")
+
+            res = scraper.get(
+                url,
+                headers=conditional_headers,
+                timeout=15,
+            )
 
-            res = scraper.get(BMS_URL, headers=headers, timeout=15)
+            # 💤 Page unchanged since the last saved value
+            if res.status_code == 304:
+                return None, http_cache
 
             if res.status_code in (403, 429):
+                reset_scraper()
                 raise RuntimeError(f"Blocked (HTTP {res.status_code})")
 
             res.raise_for_status()
 
-            soup = BeautifulSoup(res.text, "html.parser")
+            # ⚡ FAST PATH: skip the parser when the badge is plain text
+            m = INTEREST_RE.search(res.content)
+            if m:
+                interested = parse_interested(m.group(0).decode("utf-8"))
+                return interested, extract_http_cache(res)
+
+            from selectolax.lexbor import LexborHTMLParser
 
-            # 🎯 STRICT SEARCH
-            for el in soup.find_all(["div", "span", "p"]):
-                text = el.get_text(" ", strip=True)
-                if "are interested" in text.lower():
-                    return text
+            tree = LexborHTMLParser(res.content)
+
+            # 🎯 STRICT SEARCH: badge text, even when split across tags
+            text = find_interest_text(tree)
+            if text:
+                return parse_interested(text), extract_http_cache(res)
 
             raise ValueError("Interested text not found")
 
         except Exception as e:
             last_error = e
             print(
-                f"[RETRY {attempt}/{MAX_RETRIES}] "
+                f"[RETRY {attempt}/{max_retries}] "
                 f"{type(e).__name__}: {e}"
             )
 
@@ -145,55 +418,99 @@ def scrape_bms_interest():
 # =================================================
 # MAIN
 # =================================================
-def run():
+def run(url=BMS_URL, movie_code=MOVIE_CODE, api_url=BMS_API_URL):
     timestamp = ist_now_iso()
+    event_file, last_updated_file, pending_file, http_cache_file = (
+        get_event_paths(movie_code)
+    )
 
     try:
-        raw_text = scrape_bms_interest()
-        interested = parse_interested(raw_text)
-
-        data = load_json(EVENT_FILE, {
-            "eventCode": MOVIE_CODE,
+        data = load_json(event_file, {
+            "eventCode": movie_code,
             "source": "BookMyShow",
             "timezone": "Asia/Kolkata",
             "last_updated": None,
+            "last_value": None,
+            "last_timestamp": None,
             "history": {}
         })
+        pending = load_pending(pending_file)
+        apply_pending(data, pending)
+
+        # The sidecar holds the newest poll stamp between full rewrites
+        last_updated = load_last_updated(last_updated_file)
+        if last_updated and last_updated > (data.get("last_updated") or ""):
+            data["last_updated"] = last_updated
+
+        saved_cache = load_json(http_cache_file, None)
+        interested, http_cache = scrape_bms_interest(
+            url, http_cache=saved_cache, api_url=api_url
+        )
+
+        # 🔒 Nothing to parse on 304 Not Modified
+        if interested is None:
+            save_last_updated(last_updated_file, timestamp)
+            print(
+                f"[SKIP] {movie_code} | Not modified (HTTP 304) | "
+                f"last_updated set to {timestamp}"
+            )
+            return
 
         history = data.get("history", {})
 
-        last_value = get_last_interest(history)
+        last_value = get_last_interest(data)
 
-        # 🔁 ALWAYS update last_updated
+        # 🔁 ALWAYS update last_updated (cheap sidecar write)
         data["last_updated"] = timestamp
+        save_last_updated(last_updated_file, timestamp)
 
         # 🔒 Skip history write if unchanged
         if last_value == interested:
-            save_json(EVENT_FILE, data)
+            # Count confirmed: keep this 200's validators for the next poll
+            if http_cache != saved_cache:
+                save_http_cache(http_cache_file, http_cache)
             print(
-                f"[SKIP] {MOVIE_CODE} | Interest unchanged ({interested}) | "
+                f"[SKIP] {movie_code} | Interest unchanged ({interested}) | "
                 f"last_updated set to {timestamp}"
             )
             return
 
         # 🔒 Prevent overwrite of same timestamp
         if timestamp in history:
-            save_json(EVENT_FILE, data)
+            # The new count was not recorded, so its validators must not
+            # be either, or every later poll would 304 past it
+            save_http_cache(http_cache_file, None)
             print(
-                f"[SKIP] {MOVIE_CODE} | Timestamp exists | "
+                f"[SKIP] {movie_code} | Timestamp exists | "
                 f"last_updated set to {timestamp}"
             )
             return
 
         # ✅ SAVE NEW VALUE
-        history[timestamp] = interested
-        data["history"] = history
-
-        save_json(EVENT_FILE, data)
+        record = {
+            "timestamp": timestamp,
+            "interested": interested,
+        }
+        apply_pending(data, [record])
+        pending.append(record)
+
+        # 📦 Append-only until enough points pile up, then compact
+        if len(pending) >= HISTORY_COMPACT_EVERY:
+            save_json(event_file, data)
+            if os.path.exists(pending_file):
+                os.remove(pending_file)
+            compacted = f" | compacted {len(pending)} pending"
+        else:
+            append_pending(pending_file, record)
+            compacted = ""
+
+        # Validators only once the value they vouch for is recorded
+        if http_cache != saved_cache:
+            save_http_cache(http_cache_file, http_cache)
 
         print(
-            f"[OK] {MOVIE_CODE} | Interested: {interested} | "
-            f"IST {timestamp}"
+            f"[OK] {movie_code} | Interested: {interested} | "
+            f"IST {timestamp}{compacted}"
         )
 
     except Exception as e:
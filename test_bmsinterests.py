@@ -0,0 +1,21 @@
+import pytest
+
+import bmsinterests
+
+lexbor = pytest.importorskip("selectolax.lexbor")
+
+
+def find(markup):
+    return bmsinterests.find_interest_text(lexbor.LexborHTMLParser(markup))
+
+
+def test_find_interest_text_joins_badge_split_across_tags():
+    text = find("<div><span>64.6K+</span><span>are interested</span></div>")
+    assert bmsinterests.parse_interested(text) == 64600
+
+    text = find("<div>x <b>1.2K+</b> are <i>interested</i></div>")
+    assert bmsinterests.parse_interested(text) == 1200
+
+
+def test_find_interest_text_returns_none_without_badge():
+    assert find("<div><p>Are you interested?</p><p>850 are interested</p></div>") is None